@@ -0,0 +1,100 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True
+"""
+Ahead-of-time compiled version of the fused frame classifier.
+
+Numba pays a ~0.5 s JIT cost on the first call, which matters for
+frozen deployments and short-lived worker processes. Build this
+extension once with `python setup.py build_ext --inplace` and
+analysis.py will use it instead; without it, the Numba/pure-Python
+kernel keeps working unchanged. The threshold slot layout matches
+analysis.PoseThresholds.as_array.
+"""
+import numpy as np
+
+from libc.math cimport sqrt
+
+# Row indices, mirroring analysis.JOINT_NAMES order
+DEF LS = 0
+DEF RS = 1
+DEF LW = 4
+DEF RW = 5
+DEF LH = 6
+DEF RH = 7
+DEF LK = 8
+DEF RK = 9
+DEF LA = 10
+DEF RA = 11
+DEF NOSE = 12
+DEF N_POSES = 11
+
+
+cdef double _cos3(double ax, double ay, double bx, double by,
+                  double cx, double cy) nogil:
+    cdef double bax = ax - bx
+    cdef double bay = ay - by
+    cdef double bcx = cx - bx
+    cdef double bcy = cy - by
+    cdef double dot = bax * bcx + bay * bcy
+    cdef double norm = sqrt((bax * bax + bay * bay) *
+                            (bcx * bcx + bcy * bcy)) + 1e-8
+    cdef double cosang = dot / norm
+    if cosang < -1.0:
+        cosang = -1.0
+    elif cosang > 1.0:
+        cosang = 1.0
+    return cosang
+
+
+def classify_kernel(float[:, :] kp, float[:, :] prev_kp, bint has_prev,
+                    double[:] thr):
+    """
+    Drop-in replacement for analysis._classify_kernel: evaluates every
+    per-frame pose check and returns a boolean mask in POSE_NAMES order
+    (the 'walking' slot stays False for the caller to fill).
+    """
+    out = np.zeros(N_POSES, dtype=np.uint8)
+    cdef unsigned char[:] mask = out
+    cdef double cos_left, cos_right, movement_sq, dx, dy
+    cdef Py_ssize_t i
+
+    # hands_up
+    mask[0] = (kp[LW, 1] < kp[LS, 1] - thr[0] and
+               kp[RW, 1] < kp[RS, 1] - thr[0])
+    # t_pose
+    mask[1] = (abs(kp[LW, 1] - kp[LS, 1]) < thr[1] and
+               abs(kp[RW, 1] - kp[RS, 1]) < thr[1] and
+               kp[LW, 0] < kp[LS, 0] - thr[2] and
+               kp[RW, 0] > kp[RS, 0] + thr[2])
+    # squat: thr[3] is cos(knee_thresh), so the inequality is flipped;
+    # averaging cosines approximates the old average of angles
+    cos_left = _cos3(kp[LH, 0], kp[LH, 1], kp[LK, 0], kp[LK, 1],
+                     kp[LA, 0], kp[LA, 1])
+    cos_right = _cos3(kp[RH, 0], kp[RH, 1], kp[RK, 0], kp[RK, 1],
+                      kp[RA, 0], kp[RA, 1])
+    mask[2] = ((cos_left + cos_right) / 2 > thr[3] and
+               kp[LS, 1] - kp[LH, 1] > thr[7] and
+               kp[RS, 1] - kp[RH, 1] > thr[7])
+    # one_hand_raised
+    mask[3] = (kp[LW, 1] < kp[NOSE, 1]) or (kp[RW, 1] < kp[NOSE, 1])
+    # leg_raise
+    mask[7] = (kp[LA, 1] < kp[LH, 1] - thr[8] or
+               kp[RA, 1] < kp[RH, 1] - thr[8])
+    # crouch
+    mask[9] = (kp[NOSE, 1] - (kp[LS, 1] + kp[RS, 1]) / 2) > thr[9]
+    # head_tilt
+    mask[10] = abs(kp[NOSE, 0] - (kp[LS, 0] + kp[RS, 0]) / 2) > thr[10]
+
+    # Frame-delta checks
+    if has_prev:
+        movement_sq = 0.0
+        for i in range(kp.shape[0]):
+            dx = kp[i, 0] - prev_kp[i, 0]
+            dy = kp[i, 1] - prev_kp[i, 1]
+            movement_sq += dx * dx + dy * dy
+        mask[4] = movement_sq < thr[4]
+        mask[5] = (prev_kp[LA, 1] - kp[LA, 1] > thr[5] and
+                   prev_kp[RA, 1] - kp[RA, 1] > thr[5])
+        mask[6] = (abs(prev_kp[LS, 0] - kp[LS, 0]) +
+                   abs(prev_kp[RS, 0] - kp[RS, 0])) / 2 > thr[6]
+
+    return out.view(np.bool_)
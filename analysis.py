@@ -1,28 +1,98 @@
+import math
+import os
+from dataclasses import dataclass
+
 import cv2
 import mediapipe as mp
 import numpy as np
-from collections import deque
+from queue import Queue
+from threading import Event, Thread
+
+import onnx_pose
+
+# Numba is optional: with it the geometry kernels are JIT-compiled,
+# without it they run as plain Python on the same code.
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
 
 # ------------------ Setup ------------------
 mp_pose = mp.solutions.pose
 LM = mp_pose.PoseLandmark
 
-def to_xy(landmark):
+# Fixed joint order for the (13, 2) keypoint array used everywhere below.
+JOINT_NAMES = ('LEFT_SHOULDER', 'RIGHT_SHOULDER', 'LEFT_ELBOW', 'RIGHT_ELBOW',
+               'LEFT_WRIST', 'RIGHT_WRIST', 'LEFT_HIP', 'RIGHT_HIP',
+               'LEFT_KNEE', 'RIGHT_KNEE', 'LEFT_ANKLE', 'RIGHT_ANKLE', 'NOSE')
+JOINT_INDICES = tuple(LM[name].value for name in JOINT_NAMES)
+# Same indices as an array, for fancy-indexing full (33, 2) landmark arrays
+JOINT_IDX = np.array(JOINT_INDICES)
+
+# Row index of each joint in the keypoint array.
+LS, RS, LE, RE, LW, RW, LH, RH, LK, RK, LA, RA, NOSE = range(len(JOINT_NAMES))
+
+# Fixed pose order for the per-frame boolean mask and the counts vector.
+POSE_NAMES = ('hands_up', 't_pose', 'squat', 'one_hand_raised', 'standing_still',
+              'jump', 'rotation', 'leg_raise', 'walking', 'crouch', 'head_tilt')
+N_POSES = len(POSE_NAMES)
+WALKING_I = POSE_NAMES.index('walking')
+
+
+def extract_keypoints(lm, out=None):
+    """
+    Pack the tracked Mediapipe landmarks into a (13, 2) float32 array,
+    one row per joint in JOINT_NAMES order. Writes into out when given,
+    avoiding the per-frame allocation.
     """
-    Convert Mediapipe landmark object to (x, y) tuple.
+    if out is None:
+        out = np.empty((len(JOINT_NAMES), 2), dtype=np.float32)
+    for row, i in enumerate(JOINT_INDICES):
+        point = lm[i]
+        out[row, 0] = point.x
+        out[row, 1] = point.y
+    return out
+
+@njit(cache=True, fastmath=True)
+def cos3(ax, ay, bx, by, cx, cy):
     """
-    return (landmark.x, landmark.y)
+    Cosine of angle ABC from six scalar coordinates, clipped to [-1, 1].
+    Comparing cosines against a precomputed cos(threshold) avoids the
+    arccos in the hot path; cos is monotonic on [0, pi], so a test on a
+    single angle is equivalent (with the inequality flipped). Averaging
+    cosines of several angles, as the squat check does, is only an
+    approximation of averaging the angles, since cos is nonlinear.
+    """
+    bax = ax - bx
+    bay = ay - by
+    bcx = cx - bx
+    bcy = cy - by
+    dot = bax * bcx + bay * bcy
+    norm = math.sqrt((bax * bax + bay * bay) * (bcx * bcx + bcy * bcy)) + 1e-8
+    return max(-1.0, min(1.0, dot / norm))
+
+@njit(cache=True, fastmath=True)
+def angle3(ax, ay, bx, by, cx, cy):
+    """
+    Angle ABC (in degrees) from six scalar coordinates.
+    Scalar math only, so Numba compiles it without array allocation.
+    """
+    return math.degrees(math.acos(cos3(ax, ay, bx, by, cx, cy)))
 
 def angle_between(a, b, c):
     """
     Calculate angle ABC (in degrees) formed by three points.
-    a, b, c are (x, y) coordinates.
+    a, b, c are (x, y) arrays (rows of the keypoint array).
     """
-    ba = np.array([a[0] - b[0], a[1] - b[1]])
-    bc = np.array([c[0] - b[0], c[1] - b[1]])
-    cosang = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-8)
-    cosang = np.clip(cosang, -1.0, 1.0)
-    return float(np.degrees(np.arccos(cosang)))
+    return angle3(a[0], a[1], b[0], b[1], c[0], c[1])
 
 
 # ------------------ Pose Check Functions ------------------
@@ -30,50 +100,48 @@ def is_hands_up(kp, thresh=0.08):
     """
     Check if both wrists are above their respective shoulders.
     """
-    ls, rs = kp['LEFT_SHOULDER'][1], kp['RIGHT_SHOULDER'][1]
-    lw, rw = kp['LEFT_WRIST'][1], kp['RIGHT_WRIST'][1]
-    return (lw < ls - thresh) and (rw < rs - thresh)
+    return (kp[LW, 1] < kp[LS, 1] - thresh) and (kp[RW, 1] < kp[RS, 1] - thresh)
 
 def is_t_pose(kp, height_thresh=0.06, outward_thresh=0.05):
     """
     Check if arms are stretched out horizontally (like a T).
     """
-    lw, rw = kp['LEFT_WRIST'], kp['RIGHT_WRIST']
-    ls, rs = kp['LEFT_SHOULDER'], kp['RIGHT_SHOULDER']
-
-    cond_height = abs(lw[1] - ls[1]) < height_thresh and abs(rw[1] - rs[1]) < height_thresh
-    cond_outward = (lw[0] < ls[0] - outward_thresh) and (rw[0] > rs[0] + outward_thresh)
+    cond_height = abs(kp[LW, 1] - kp[LS, 1]) < height_thresh and \
+                  abs(kp[RW, 1] - kp[RS, 1]) < height_thresh
+    cond_outward = (kp[LW, 0] < kp[LS, 0] - outward_thresh) and \
+                   (kp[RW, 0] > kp[RS, 0] + outward_thresh)
     return cond_height and cond_outward
 
 def is_squat(kp, knee_angle_thresh=120, hip_drop_thresh=0.05):
     """
     Check if both knees are bent enough and hips are lowered.
+    The knee test averages cosines rather than degrees — a close but not
+    exact stand-in for the original average-angle threshold when the two
+    knees differ a lot.
     """
-    left_knee = angle_between(kp['LEFT_HIP'], kp['LEFT_KNEE'], kp['LEFT_ANKLE'])
-    right_knee = angle_between(kp['RIGHT_HIP'], kp['RIGHT_KNEE'], kp['RIGHT_ANKLE'])
-    avg_knee = (left_knee + right_knee) / 2
+    cos_knee = math.cos(math.radians(knee_angle_thresh))
+    cos_left = cos3(kp[LH, 0], kp[LH, 1], kp[LK, 0], kp[LK, 1], kp[LA, 0], kp[LA, 1])
+    cos_right = cos3(kp[RH, 0], kp[RH, 1], kp[RK, 0], kp[RK, 1], kp[RA, 0], kp[RA, 1])
 
-    left_hip_drop = kp['LEFT_SHOULDER'][1] - kp['LEFT_HIP'][1]
-    right_hip_drop = kp['RIGHT_SHOULDER'][1] - kp['RIGHT_HIP'][1]
+    left_hip_drop = kp[LS, 1] - kp[LH, 1]
+    right_hip_drop = kp[RS, 1] - kp[RH, 1]
     hip_drop_ok = (left_hip_drop > hip_drop_thresh) and (right_hip_drop > hip_drop_thresh)
 
-    return avg_knee < knee_angle_thresh and hip_drop_ok
+    return (cos_left + cos_right) / 2 > cos_knee and hip_drop_ok
 
 def is_one_hand_raised(kp):
     """
     Check if at least one hand is raised above the head.
     """
-    lw, rw = kp['LEFT_WRIST'][1], kp['RIGHT_WRIST'][1]
-    head_y = kp['NOSE'][1]
-    return (lw < head_y) or (rw < head_y)
+    return (kp[LW, 1] < kp[NOSE, 1]) or (kp[RW, 1] < kp[NOSE, 1])
 
 def is_jump(kp, prev_kp, jump_thresh=0.05):
     """
     Detect jumping by sudden upward movement of both ankles.
     """
-    if prev_kp:
-        left_ankle_delta = prev_kp['LEFT_ANKLE'][1] - kp['LEFT_ANKLE'][1]
-        right_ankle_delta = prev_kp['RIGHT_ANKLE'][1] - kp['RIGHT_ANKLE'][1]
+    if prev_kp is not None:
+        left_ankle_delta = prev_kp[LA, 1] - kp[LA, 1]
+        right_ankle_delta = prev_kp[RA, 1] - kp[RA, 1]
         return left_ankle_delta > jump_thresh and right_ankle_delta > jump_thresh
     return False
 
@@ -81,9 +149,9 @@ def is_rotation(kp, prev_kp, rot_thresh=0.05):
     """
     Detect body rotation by checking shoulder movement along x-axis.
     """
-    if prev_kp:
-        left_shoulder_delta = abs(prev_kp['LEFT_SHOULDER'][0] - kp['LEFT_SHOULDER'][0])
-        right_shoulder_delta = abs(prev_kp['RIGHT_SHOULDER'][0] - kp['RIGHT_SHOULDER'][0])
+    if prev_kp is not None:
+        left_shoulder_delta = abs(prev_kp[LS, 0] - kp[LS, 0])
+        right_shoulder_delta = abs(prev_kp[RS, 0] - kp[RS, 0])
         return (left_shoulder_delta + right_shoulder_delta) / 2 > rot_thresh
     return False
 
@@ -91,153 +159,499 @@ def is_leg_raise(kp, hip_thresh=0.1):
     """
     Check if either leg is lifted above hip level.
     """
-    return (kp['LEFT_ANKLE'][1] < kp['LEFT_HIP'][1] - hip_thresh) or \
-           (kp['RIGHT_ANKLE'][1] < kp['RIGHT_HIP'][1] - hip_thresh)
+    return (kp[LA, 1] < kp[LH, 1] - hip_thresh) or \
+           (kp[RA, 1] < kp[RH, 1] - hip_thresh)
 
 def is_crouch(kp, torso_thresh=0.05):
     """
     Detect crouching by checking if head is closer to shoulders.
     """
-    nose = kp['NOSE'][1]
-    shoulders = (kp['LEFT_SHOULDER'][1] + kp['RIGHT_SHOULDER'][1]) / 2
-    return (nose - shoulders) > torso_thresh
+    shoulders = (kp[LS, 1] + kp[RS, 1]) / 2
+    return (kp[NOSE, 1] - shoulders) > torso_thresh
 
 def is_head_tilt(kp, tilt_thresh=0.05):
     """
     Check if head is tilted sideways compared to shoulder mid-point.
     """
-    left_sh, right_sh = kp['LEFT_SHOULDER'][0], kp['RIGHT_SHOULDER'][0]
-    mid = (left_sh + right_sh) / 2
-    nose = kp['NOSE'][0]
-    return abs(nose - mid) > tilt_thresh
+    mid = (kp[LS, 0] + kp[RS, 0]) / 2
+    return abs(kp[NOSE, 0] - mid) > tilt_thresh
+
+
+# ------------------ Fused Frame Classifier ------------------
+@dataclass(frozen=True)
+class PoseThresholds:
+    """
+    Pose thresholds in the space the classifier kernel compares in,
+    derived once per analyze_video call instead of per frame: the knee
+    threshold lives in cosine space (no arccos in the hot loop) and the
+    standing threshold in squared space (no sqrt per joint).
+    """
+    hands: float = 0.08
+    t_height: float = 0.06
+    t_outward: float = 0.05
+    cos_knee: float = math.cos(math.radians(120))
+    standing_sq: float = 0.02 ** 2 / len(JOINT_NAMES)
+    jump: float = 0.05
+    rot: float = 0.05
+    hip_drop: float = 0.05
+    leg_hip: float = 0.1
+    torso: float = 0.05
+    tilt: float = 0.05
+
+    @classmethod
+    def from_raw(cls, hands_thresh=0.08, t_height=0.06, t_outward=0.05,
+                 knee_thresh=120, standing_thresh=0.02,
+                 jump_thresh=0.05, rot_thresh=0.05,
+                 hip_drop_thresh=0.05, leg_hip_thresh=0.1,
+                 torso_thresh=0.05, tilt_thresh=0.05):
+        """
+        Build from the tunables analyze_video exposes (knee threshold in
+        degrees, standing threshold as a summed per-joint norm). For
+        motion spread evenly over the joints, summed squared distances
+        below standing_thresh**2 / n_joints matches the old
+        sum-of-norms test.
+        """
+        return cls(hands=hands_thresh, t_height=t_height,
+                   t_outward=t_outward,
+                   cos_knee=math.cos(math.radians(knee_thresh)),
+                   standing_sq=standing_thresh ** 2 / len(JOINT_NAMES),
+                   jump=jump_thresh, rot=rot_thresh,
+                   hip_drop=hip_drop_thresh, leg_hip=leg_hip_thresh,
+                   torso=torso_thresh, tilt=tilt_thresh)
+
+    def as_array(self):
+        """
+        Pack into the float vector _classify_kernel indexes:
+        0 hands, 1 t_height, 2 t_outward, 3 cos(knee), 4 standing_sq,
+        5 jump, 6 rot, 7 hip_drop, 8 leg_hip, 9 torso, 10 tilt.
+        """
+        return np.array([self.hands, self.t_height, self.t_outward,
+                         self.cos_knee, self.standing_sq, self.jump,
+                         self.rot, self.hip_drop, self.leg_hip,
+                         self.torso, self.tilt], dtype=np.float64)
+
+
+def pack_thresholds(**kwargs):
+    """
+    Pack the pose thresholds into the float array _classify_kernel
+    expects; accepts the same keyword tunables as PoseThresholds.from_raw.
+    """
+    return PoseThresholds.from_raw(**kwargs).as_array()
+
+@njit(cache=True, fastmath=True)
+def _classify_kernel(kp, prev_kp, has_prev, thr):
+    """
+    Scalar-math core of classify_frame, JIT-compiled when Numba is present.
+    kp and prev_kp are (13, 2) float32 arrays; when has_prev is False,
+    prev_kp is ignored (callers pass kp itself as a placeholder).
+    """
+    mask = np.zeros(N_POSES, dtype=np.bool_)
+
+    # hands_up
+    mask[0] = (kp[LW, 1] < kp[LS, 1] - thr[0]) and (kp[RW, 1] < kp[RS, 1] - thr[0])
+    # t_pose
+    mask[1] = (abs(kp[LW, 1] - kp[LS, 1]) < thr[1] and
+               abs(kp[RW, 1] - kp[RS, 1]) < thr[1] and
+               kp[LW, 0] < kp[LS, 0] - thr[2] and
+               kp[RW, 0] > kp[RS, 0] + thr[2])
+    # squat: thr[3] is cos(knee_thresh), so the inequality is flipped;
+    # averaging cosines approximates the old average of angles
+    cos_left = cos3(kp[LH, 0], kp[LH, 1], kp[LK, 0], kp[LK, 1], kp[LA, 0], kp[LA, 1])
+    cos_right = cos3(kp[RH, 0], kp[RH, 1], kp[RK, 0], kp[RK, 1], kp[RA, 0], kp[RA, 1])
+    hip_drop_ok = (kp[LS, 1] - kp[LH, 1] > thr[7]) and (kp[RS, 1] - kp[RH, 1] > thr[7])
+    mask[2] = (cos_left + cos_right) / 2 > thr[3] and hip_drop_ok
+    # one_hand_raised
+    mask[3] = (kp[LW, 1] < kp[NOSE, 1]) or (kp[RW, 1] < kp[NOSE, 1])
+    # leg_raise
+    mask[7] = (kp[LA, 1] < kp[LH, 1] - thr[8]) or (kp[RA, 1] < kp[RH, 1] - thr[8])
+    # crouch
+    mask[9] = (kp[NOSE, 1] - (kp[LS, 1] + kp[RS, 1]) / 2) > thr[9]
+    # head_tilt
+    mask[10] = abs(kp[NOSE, 0] - (kp[LS, 0] + kp[RS, 0]) / 2) > thr[10]
+
+    # Frame-delta checks
+    if has_prev:
+        movement_sq = 0.0
+        for i in range(kp.shape[0]):
+            dx = kp[i, 0] - prev_kp[i, 0]
+            dy = kp[i, 1] - prev_kp[i, 1]
+            movement_sq += dx * dx + dy * dy
+        mask[4] = movement_sq < thr[4]
+        mask[5] = (prev_kp[LA, 1] - kp[LA, 1] > thr[5]) and \
+                  (prev_kp[RA, 1] - kp[RA, 1] > thr[5])
+        mask[6] = (abs(prev_kp[LS, 0] - kp[LS, 0]) +
+                   abs(prev_kp[RS, 0] - kp[RS, 0])) / 2 > thr[6]
+
+    return mask
+
+# Prefer the ahead-of-time Cython build of the kernel when it has been
+# compiled (python setup.py build_ext --inplace); unlike Numba it has no
+# first-call JIT cost, which matters for short-lived worker processes.
+# The Python/Numba kernel stays importable under its own name so the
+# parity test can compare the two implementations.
+_py_classify_kernel = _classify_kernel
+try:
+    from _predicates import classify_kernel as _classify_kernel  # noqa: F811
+    HAS_CYTHON_KERNEL = True
+except ImportError:
+    HAS_CYTHON_KERNEL = False
+
+
+def classify_frame(kp, prev_kp, **thresholds):
+    """
+    Evaluate all per-frame pose checks in one pass over the keypoint array.
+    Returns a boolean mask in POSE_NAMES order; the 'walking' slot is left
+    False since it needs the stateful WalkingDetector.
+    """
+    thr = pack_thresholds(**thresholds)
+    if prev_kp is None:
+        return _classify_kernel(kp, kp, False, thr)
+    return _classify_kernel(kp, prev_kp, True, thr)
 
 
 # ------------------ Walking Detector ------------------
 class WalkingDetector:
     """
     Detects walking by checking alternating ankle motion over frames.
-    Uses a buffer of recent movements to confirm walking.
+    Step events are packed as bits into an integer ring (left=0, right=1)
+    capped at buffer_size events, so the per-frame alternation check is a
+    single XOR/mask test with no list building or allocations.
     """
     def __init__(self, buffer_size=30, x_thresh=0.02, min_alt_steps=3):
-        self.left_rel = deque(maxlen=buffer_size)
-        self.right_rel = deque(maxlen=buffer_size)
-        self.events = deque(maxlen=buffer_size)
-        self.frame_idx = 0
+        self.prev_left_rel = None
+        self.prev_right_rel = None
+        self.event_bits = 0
+        self.event_count = 0
+        self.bits_mask = (1 << buffer_size) - 1
         self.x_thresh = x_thresh
         self.min_alt_steps = min_alt_steps
 
+    def _push_event(self, side_bit):
+        self.event_bits = ((self.event_bits << 1) | side_bit) & self.bits_mask
+        self.event_count += 1
+
     def update(self, kp):
         """
         Update detector with new frame keypoints.
         Returns True if walking detected in this frame.
         """
-        self.frame_idx += 1
-        lx, _ = kp['LEFT_ANKLE']
-        rx, _ = kp['RIGHT_ANKLE']
-        lhx, _ = kp['LEFT_HIP']
-        rhx, _ = kp['RIGHT_HIP']
-
         # Relative ankle position w.r.t hips
-        self.left_rel.append(lx - lhx)
-        self.right_rel.append(rx - rhx)
+        left_rel = kp[LA, 0] - kp[LH, 0]
+        right_rel = kp[RA, 0] - kp[RH, 0]
 
-        if len(self.left_rel) < 2:
+        if self.prev_left_rel is None:
+            self.prev_left_rel = left_rel
+            self.prev_right_rel = right_rel
             return False
 
         # Detect step events (change in relative x position)
-        if abs(self.left_rel[-1] - self.left_rel[-2]) > self.x_thresh:
-            self.events.append(('L', self.frame_idx))
-        if abs(self.right_rel[-1] - self.right_rel[-2]) > self.x_thresh:
-            self.events.append(('R', self.frame_idx))
+        if abs(left_rel - self.prev_left_rel) > self.x_thresh:
+            self._push_event(0)
+        if abs(right_rel - self.prev_right_rel) > self.x_thresh:
+            self._push_event(1)
 
+        self.prev_left_rel = left_rel
+        self.prev_right_rel = right_rel
         return self.is_walking()
 
     def is_walking(self):
         """
         Walking is confirmed if enough alternating steps are seen recently.
+        The last min_alt_steps events alternate exactly when every
+        adjacent bit pair differs, i.e. bits XOR (bits >> 1) is all ones.
         """
-        if len(self.events) < self.min_alt_steps:
+        if self.event_count < self.min_alt_steps:
             return False
-        last_steps = [e[0] for e in list(self.events)[-self.min_alt_steps:]]
-        return all(last_steps[i] != last_steps[i+1] for i in range(len(last_steps) - 1))
+        alt = self.event_bits ^ (self.event_bits >> 1)
+        mask = (1 << (self.min_alt_steps - 1)) - 1
+        return (alt & mask) == mask
+
+
+# ------------------ Worker Process Support ------------------
+# Per-process shared Pose graph, set up once by init_worker
+_WORKER_POSE = None
+
+
+def init_worker():
+    """
+    Warm a per-process Pose graph. Meant as a multiprocessing.Pool
+    initializer so each worker pays graph construction once at startup;
+    analyze_video then reuses it whenever no pose_obj is passed in.
+    """
+    global _WORKER_POSE
+    _WORKER_POSE = mp_pose.Pose(min_detection_confidence=0.5,
+                                min_tracking_confidence=0.5)
 
 
 # ------------------ Main Video Analysis ------------------
+# Small queue bounds memory while keeping the decoder ahead of inference
+# (deep enough for the ONNX backend to fill a whole batch)
+_QUEUE_DEPTH = 8
+# Per-frame masks accumulate in chunks of this many rows, reduced with
+# one vectorized sum per chunk instead of one counts update per frame
+_MASK_CHUNK = 1024
+# Marker for frames that were grabbed but not decoded (frame skipping)
+_SKIPPED = object()
+# Set DANCE_HWACCEL to an FFmpeg hwaccel name (vaapi, cuda,
+# videotoolbox, ...) to offload H.264 decode to hardware; FFmpeg falls
+# back to its software decoder when the backend is unavailable.
+_HWACCEL = os.environ.get("DANCE_HWACCEL")
+
+
+def _open_capture(video_path):
+    """
+    Open a video through OpenCV's FFmpeg backend, requesting hardware
+    decode when DANCE_HWACCEL selects an accelerator.
+    """
+    if _HWACCEL:
+        os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS",
+                              "hwaccel;" + _HWACCEL)
+    return cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+
+
+def _frame_producer(cap, frame_q, frame_skip, max_width, stop):
+    """
+    Decode frames on a worker thread so disk reads, H.264 decode, resize
+    and colour conversion overlap with pose inference on the main thread.
+    Puts RGB frames (or _SKIPPED markers) on frame_q, and always a
+    terminating None on exit — even when decoding raises — so the
+    consumer's frame_q.get() can never block forever. Stops early once
+    stop is set; the consumer drains the queue on shutdown so a put
+    blocked on a full queue can always finish.
+    """
+    # cvtColor writes into a ring of preallocated RGB buffers instead of
+    # allocating a fresh frame-sized array every iteration. The ring is
+    # deeper than the queue plus the largest ONNX batch, so a buffer is
+    # never overwritten while the consumer still holds it.
+    rgb_bufs = [None] * (_QUEUE_DEPTH + onnx_pose.BATCH_SIZE + 2)
+    buf_i = 0
+    idx = 0
+    try:
+        while not stop.is_set():
+            if frame_skip > 1 and idx % frame_skip != 0:
+                # Skipped frame: grab() advances the stream without the
+                # decode cost of retrieve().
+                if not cap.grab():
+                    break
+                frame_q.put(_SKIPPED)
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if max_width and frame.shape[1] > max_width:
+                    height = int(max_width * frame.shape[0] / frame.shape[1])
+                    frame = cv2.resize(frame, (max_width, height),
+                                       interpolation=cv2.INTER_AREA)
+                buf = rgb_bufs[buf_i]
+                if buf is None or buf.shape != frame.shape:
+                    buf = np.empty_like(frame)
+                    rgb_bufs[buf_i] = buf
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buf)
+                frame_q.put(buf)
+                buf_i = (buf_i + 1) % len(rgb_bufs)
+            idx += 1
+    finally:
+        # The consumer keeps get()ing until it sees this None (its own
+        # finally drains the queue on abnormal exits), so the put cannot
+        # deadlock even when the queue is full.
+        frame_q.put(None)
+
+
 def analyze_video(video_path,
                   hands_thresh=0.08, t_height=0.06, t_outward=0.05,
                   knee_thresh=140, standing_thresh=0.02,
-                  jump_thresh=0.05, rot_thresh=0.05):
+                  jump_thresh=0.05, rot_thresh=0.05,
+                  frame_skip=2, max_width=640, pose_obj=None,
+                  use_onnx=None):
     """
     Analyze a video and count how many frames contain certain poses.
+    Mediapipe inference runs on every frame_skip-th frame; in between,
+    frames are grabbed without decoding and the last detected pose is
+    reused, since dance poses change slowly across adjacent frames.
+    Frames wider than max_width are downscaled before inference — the
+    pose model works at ~256px internally, so extra resolution only
+    costs conversion and preprocessing time (landmarks stay normalized).
+    Pass a shared mp_pose.Pose as pose_obj to skip the expensive graph
+    construction per call (the caller then owns its lifetime and must
+    serialize concurrent use); otherwise one is created and closed here.
+    With use_onnx left as None, inference goes through the ONNX Runtime
+    backend whenever onnx_pose.available() says so, else Mediapipe.
     Returns a summary dictionary.
     """
-    cap = cv2.VideoCapture(video_path)
+    cap = _open_capture(video_path)
     if not cap.isOpened():
         return {"error": f"Cannot open video: {video_path}"}
 
-    # Pose frame counts
-    pose_counts = {
-        "hands_up": 0, "t_pose": 0, "squat": 0,
-        "one_hand_raised": 0, "standing_still": 0,
-        "jump": 0, "rotation": 0,
-        "leg_raise": 0, "walking": 0, "crouch": 0, "head_tilt": 0
-    }
+    # Pose frame counts, one slot per POSE_NAMES entry
+    counts = np.zeros(N_POSES, dtype=np.int64)
+    thr = PoseThresholds.from_raw(hands_thresh=hands_thresh,
+                                  t_height=t_height, t_outward=t_outward,
+                                  knee_thresh=knee_thresh,
+                                  standing_thresh=standing_thresh,
+                                  jump_thresh=jump_thresh,
+                                  rot_thresh=rot_thresh).as_array()
 
     total_frames = 0
     prev_landmarks = None
     walk_detector = WalkingDetector(buffer_size=30, x_thresh=0.02, min_alt_steps=3)
 
-    # Run Mediapipe pose tracking
-    with mp_pose.Pose(min_detection_confidence=0.5,
-                      min_tracking_confidence=0.5) as pose:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            total_frames += 1
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = pose.process(rgb)
-
-            if result.pose_landmarks:
-                lm = result.pose_landmarks.landmark
-                kp = {}
-                # Store only the key landmarks needed
-                for name in ['LEFT_SHOULDER','RIGHT_SHOULDER','LEFT_ELBOW','RIGHT_ELBOW',
-                             'LEFT_WRIST','RIGHT_WRIST','LEFT_HIP','RIGHT_HIP',
-                             'LEFT_KNEE','RIGHT_KNEE','LEFT_ANKLE','RIGHT_ANKLE','NOSE']:
-                    idx = getattr(LM, name).value
-                    kp[name] = to_xy(lm[idx])
-
-                # Pose detections
-                if is_hands_up(kp, hands_thresh): pose_counts['hands_up'] += 1
-                if is_t_pose(kp, t_height, t_outward): pose_counts['t_pose'] += 1
-                if is_squat(kp, knee_thresh): pose_counts['squat'] += 1
-                if is_one_hand_raised(kp): pose_counts['one_hand_raised'] += 1
-                if is_jump(kp, prev_landmarks, jump_thresh): pose_counts['jump'] += 1
-                if is_rotation(kp, prev_landmarks, rot_thresh): pose_counts['rotation'] += 1
-                if is_leg_raise(kp): pose_counts['leg_raise'] += 1
-                if is_crouch(kp): pose_counts['crouch'] += 1
-                if is_head_tilt(kp): pose_counts['head_tilt'] += 1
-
-                # Standing still detection (very little movement between frames)
-                if prev_landmarks:
-                    movement = sum([np.linalg.norm(np.array(kp[k]) - np.array(prev_landmarks[k])) for k in kp])
-                    if movement < standing_thresh:
-                        pose_counts['standing_still'] += 1
-
-                # Walking detection
-                if walk_detector.update(kp):
-                    pose_counts['walking'] += 1
-
-                prev_landmarks = kp
-
-    cap.release()
+    last_mask = None
+
+    # Pick the inference backend before the decode thread starts, so a
+    # failed construction cannot leave a producer blocked on the queue:
+    # ONNX Runtime when an exported model is around, Mediapipe otherwise
+    # (building a Pose graph only when the caller did not supply a
+    # shared one)
+    try:
+        if use_onnx is None:
+            use_onnx = onnx_pose.available()
+        estimator = onnx_pose.OnnxPoseEstimator() if use_onnx else None
+        if pose_obj is None:
+            pose_obj = _WORKER_POSE
+        own_pose = estimator is None and pose_obj is None
+        pose = None
+        if estimator is None:
+            if pose_obj is not None:
+                # A reused graph still carries the previous video's
+                # tracking ROI; reset so this video's first frames
+                # start clean
+                pose_obj.reset()
+                pose = pose_obj
+            else:
+                pose = mp_pose.Pose(min_detection_confidence=0.5,
+                                    min_tracking_confidence=0.5)
+    except Exception:
+        cap.release()
+        raise
+
+    # Decode on a worker thread, infer on this one
+    frame_q = Queue(maxsize=_QUEUE_DEPTH)
+    stop_producer = Event()
+    producer = Thread(target=_frame_producer,
+                      args=(cap, frame_q, frame_skip, max_width,
+                            stop_producer),
+                      daemon=True)
+    producer.start()
+    # Two persistent keypoint buffers, swapped after each detected frame
+    # so neither extraction nor prev-frame tracking allocates per frame
+    kp_bufs = [np.empty((len(JOINT_NAMES), 2), dtype=np.float32),
+               np.empty((len(JOINT_NAMES), 2), dtype=np.float32)]
+    cur_buf = 0
+
+    # Per-frame masks land row-by-row in a chunk buffer that is reduced
+    # with a single vectorized sum when full (and once at the end)
+    mask_buf = np.empty((_MASK_CHUNK, N_POSES), dtype=np.bool_)
+    n_masks = 0
+
+    def flush_masks():
+        nonlocal counts, n_masks
+        if n_masks:
+            counts += mask_buf[:n_masks].sum(axis=0)
+            n_masks = 0
+
+    def push_mask(mask):
+        nonlocal n_masks
+        mask_buf[n_masks] = mask
+        n_masks += 1
+        if n_masks == _MASK_CHUNK:
+            flush_masks()
+
+    def tally_skipped():
+        # Reuse the last detected pose on skipped frames
+        nonlocal total_frames
+        total_frames += 1
+        if last_mask is not None:
+            mask = last_mask.copy()
+            mask[WALKING_I] = walk_detector.update(prev_landmarks)
+            push_mask(mask)
+
+    def tally_frame(kp):
+        # Per-frame bookkeeping once landmarks (or None) are known
+        nonlocal total_frames, prev_landmarks, last_mask, cur_buf
+        total_frames += 1
+        if kp is not None:
+            # All pose checks fused into one mask
+            if prev_landmarks is None:
+                mask = _classify_kernel(kp, kp, False, thr)
+            else:
+                mask = _classify_kernel(kp, prev_landmarks, True, thr)
+            mask[WALKING_I] = walk_detector.update(kp)
+            push_mask(mask)
+
+            prev_landmarks = kp
+            last_mask = mask
+            # The other buffer becomes the write target for the next frame
+            cur_buf = 1 - cur_buf
+        else:
+            # Pose lost: do not keep reusing a stale mask
+            last_mask = None
+
+    stream_done = False
+    try:
+        if estimator is not None:
+            # ONNX path: group decoded frames into one session.run per
+            # batch; the producer thread keeps decoding meanwhile. The
+            # cheap predicates still run serially, in frame order.
+            pending = []
+            batch = []
+            eof = False
+            while not eof:
+                item = frame_q.get()
+                if item is None:
+                    eof = True
+                    stream_done = True
+                else:
+                    pending.append(item)
+                    if item is not _SKIPPED:
+                        batch.append(item)
+                if batch and (eof or len(batch) == onnx_pose.BATCH_SIZE):
+                    results = iter(estimator.infer_batch(batch))
+                    for queued in pending:
+                        if queued is _SKIPPED:
+                            tally_skipped()
+                        else:
+                            pts = next(results)
+                            kp = None if pts is None else \
+                                np.take(pts, JOINT_IDX, axis=0,
+                                        out=kp_bufs[cur_buf])
+                            tally_frame(kp)
+                    pending = []
+                    batch = []
+            for queued in pending:
+                # Trailing skip markers with no decoded frame among them
+                tally_skipped()
+        else:
+            while True:
+                rgb = frame_q.get()
+                if rgb is None:
+                    stream_done = True
+                    break
+                if rgb is _SKIPPED:
+                    tally_skipped()
+                    continue
+                result = pose.process(rgb)
+                kp = None if not result.pose_landmarks else \
+                    extract_keypoints(result.pose_landmarks.landmark,
+                                      out=kp_bufs[cur_buf])
+                tally_frame(kp)
+    finally:
+        if own_pose:
+            pose.close()
+        if not stream_done:
+            # Bailed out mid-stream (e.g. inference raised): unblock a
+            # producer stuck on a full queue and wait for its final None
+            stop_producer.set()
+            while frame_q.get() is not None:
+                pass
+        producer.join()
+        cap.release()
+
+    flush_masks()
 
     # Final summary
     summary = {
         "video": video_path,
         "total_frames": total_frames,
-        "poses_detected": pose_counts
+        "poses_detected": dict(zip(POSE_NAMES, counts.tolist()))
     }
     return summary
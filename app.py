@@ -1,7 +1,9 @@
 from flask import Flask, request, jsonify
 import os
+import tempfile
 import threading
-from analysis import analyze_video
+from multiprocessing import get_context
+from analysis import analyze_video, init_worker
 import subprocess
 
 # ----------------------------
@@ -9,6 +11,26 @@ import subprocess
 # ----------------------------
 app = Flask(__name__)
 
+# Concurrent uploads run in a spawn-based process pool: each worker
+# builds its own Pose graph once (init_worker), and videos analyze in
+# parallel across cores instead of serializing behind the GIL and a
+# single shared graph. Created lazily so importing the app stays cheap.
+POOL_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+POOL = None
+POOL_LOCK = threading.Lock()
+
+def get_pool():
+    global POOL
+    with POOL_LOCK:
+        if POOL is None:
+            POOL = get_context("spawn").Pool(processes=POOL_WORKERS,
+                                             initializer=init_worker)
+    return POOL
+
+# Uploads go to a RAM-backed directory when one exists, so the
+# write-then-reopen cycle never touches disk
+UPLOAD_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
 @app.route("/")
 def home():
     return jsonify({"message": "Dance Analysis Server is running!"})
@@ -19,11 +41,17 @@ def upload_video():
         return jsonify({"error": "No video uploaded"}), 400
     
     video_file = request.files["video"]
-    os.makedirs("Dataset", exist_ok=True)
-    video_path = os.path.join("Dataset", video_file.filename)
-    video_file.save(video_path)
-    
-    results = analyze_video(video_path)
+    suffix = os.path.splitext(video_file.filename)[1] or ".mp4"
+    fd, video_path = tempfile.mkstemp(suffix=suffix, dir=UPLOAD_TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            video_file.save(f)
+        results = get_pool().apply_async(analyze_video, (video_path,)).get()
+    finally:
+        os.unlink(video_path)
+
+    if "video" in results:
+        results["video"] = video_file.filename
     return jsonify({"message": f"{video_file.filename} uploaded successfully!", "results": results})
 
 def run_flask():
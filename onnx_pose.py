@@ -0,0 +1,123 @@
+"""
+Optional ONNX Runtime backend for BlazePose landmark inference.
+
+Mediapipe's Python solution drives its TFLite graph through a
+synchronous C++ bridge that leaves most CPU cores idle. When an exported
+pose-landmark ONNX model is available on disk, this module runs it
+directly through ONNX Runtime with all graph optimizations enabled and
+intra-op threading sized to the machine. analysis.analyze_video picks
+this backend up automatically when both onnxruntime and the model file
+are present, and falls back to Mediapipe otherwise.
+"""
+import os
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    HAS_ORT = True
+except ImportError:
+    HAS_ORT = False
+
+# Exported BlazePose landmark model (convert Mediapipe's
+# pose_landmark_full.tflite with tf2onnx: python -m tf2onnx.convert
+# --tflite pose_landmark_full.tflite --output pose_landmark.onnx).
+# tf2onnx keeps the TFLite batch dimension fixed at 1; to enable real
+# batching, rewrite it to be symbolic after export, e.g. with the onnx
+# package: model.graph.input[0].type.tensor_type.shape.dim[0].dim_param
+# = "N". With a static batch-1 model, infer_batch falls back to one
+# run per frame.
+MODEL_PATH = os.environ.get("POSE_ONNX_MODEL", "pose_landmark.onnx")
+# INT8 variant produced by quantize_pose_model.py; preferred when it
+# exists, since ORT dispatches its Conv/MatMul layers to MLAS INT8
+# kernels (VNNI on supporting CPUs)
+INT8_MODEL_PATH = os.environ.get("POSE_ONNX_INT8_MODEL",
+                                 "pose_landmark_int8.onnx")
+# Minimum pose-presence score to accept a frame's landmarks
+SCORE_THRESH = 0.5
+# Frames per session.run call in batch mode
+BATCH_SIZE = 8
+
+
+def default_model_path():
+    """
+    Path of the model the estimator will load: the INT8 variant when it
+    has been generated, the float model otherwise.
+    """
+    if os.path.exists(INT8_MODEL_PATH):
+        return INT8_MODEL_PATH
+    return MODEL_PATH
+
+
+def available(model_path=None):
+    """
+    True when onnxruntime is importable and a model file exists.
+    """
+    return HAS_ORT and os.path.exists(model_path or default_model_path())
+
+
+class OnnxPoseEstimator:
+    """
+    Runs the BlazePose landmark model through ONNX Runtime and returns
+    normalized (x, y) coordinates for the 33 pose landmarks.
+    """
+    def __init__(self, model_path=None):
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path or default_model_path(),
+                                            sess_options=opts,
+                                            providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # NHWC model: shape is (N, H, W, 3)
+        self.input_size = (int(inp.shape[1]), int(inp.shape[2]))
+        # Batching only works when the N dimension is symbolic/dynamic;
+        # ORT rejects multi-frame tensors on a static batch-1 export
+        dim0 = inp.shape[0]
+        self.supports_batch = not isinstance(dim0, int) or dim0 > 1
+
+    def _prepare(self, rgb):
+        """
+        Resize an RGB frame to the model input and scale to [0, 1].
+        """
+        h, w = self.input_size
+        resized = cv2.resize(rgb, (w, h), interpolation=cv2.INTER_LINEAR)
+        return resized.astype(np.float32) / 255.0
+
+    def _decode(self, outputs, i):
+        """
+        Turn raw model outputs for batch item i into a (33, 2) float32
+        array of normalized coordinates, or None if no pose is present.
+        """
+        landmarks, score = outputs[0][i], outputs[1][i]
+        if float(np.ravel(score)[0]) < SCORE_THRESH:
+            return None
+        # 5 values per landmark (x, y, z, visibility, presence), in
+        # pixel coordinates of the model input frame
+        pts = landmarks.reshape(-1, 5)[:33, :2]
+        h, w = self.input_size
+        return (pts / np.array([w, h], dtype=np.float32)).astype(np.float32)
+
+    def infer(self, rgb):
+        """
+        Run one frame. Returns a (33, 2) float32 array of normalized
+        landmark coordinates, or None when no pose is detected.
+        """
+        batch = self._prepare(rgb)[np.newaxis]
+        outputs = self.session.run(None, {self.input_name: batch})
+        return self._decode(outputs, 0)
+
+    def infer_batch(self, frames):
+        """
+        Run several frames through one session.run call — something the
+        Mediapipe Python solution cannot do. Returns a list with one
+        (33, 2) array (or None) per input frame, in order. Models
+        exported with a static batch-1 input are run frame by frame.
+        """
+        if not self.supports_batch:
+            return [self.infer(rgb) for rgb in frames]
+        batch = np.stack([self._prepare(rgb) for rgb in frames])
+        outputs = self.session.run(None, {self.input_name: batch})
+        return [self._decode(outputs, i) for i in range(len(frames))]
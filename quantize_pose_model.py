@@ -0,0 +1,31 @@
+"""
+Quantize the exported pose-landmark ONNX model to INT8.
+
+Dynamic quantization shrinks the Conv/MatMul weights to 8 bit; ONNX
+Runtime then runs them through its MLAS INT8 kernels, which use VNNI on
+Cascade Lake+ CPUs (~4x FP32 matmul throughput) and AVX2 byte-multiply
+elsewhere. The per-joint pose thresholds (0.05-0.1 in normalized
+coordinates) are far above typical quantization error, so pose counts
+are unaffected in practice — still worth spot-checking against a
+reference video after regenerating the model.
+
+Usage: python quantize_pose_model.py [input.onnx [output.onnx]]
+Defaults to the paths onnx_pose uses; once the INT8 file exists,
+onnx_pose picks it up automatically.
+"""
+import sys
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+import onnx_pose
+
+
+def main(argv):
+    src = argv[1] if len(argv) > 1 else onnx_pose.MODEL_PATH
+    dst = argv[2] if len(argv) > 2 else onnx_pose.INT8_MODEL_PATH
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    print(f"Quantized {src} -> {dst}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,29 @@
+"""
+Build script for the optional Cython predicate kernel.
+
+    python setup.py build_ext --inplace
+
+compiles _predicates.pyx into an extension that analysis.py prefers
+over the Numba/pure-Python kernel. Cython is only needed to build;
+without it (or without the built extension) everything still runs.
+"""
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+extensions = []
+if cythonize is not None:
+    extensions = cythonize(
+        [Extension("_predicates", ["_predicates.pyx"],
+                   extra_compile_args=["-O3", "-ffast-math"])],
+        language_level=3,
+    )
+
+setup(
+    name="dance-analysis",
+    py_modules=["analysis", "app", "frontend", "onnx_pose"],
+    ext_modules=extensions,
+)
@@ -1,6 +1,16 @@
+import math
 import os
+from collections import deque
+
+import numpy as np
 import pytest
-from analysis import analyze_video
+
+from analysis import (
+    JOINT_NAMES, POSE_NAMES, LA, LH, RA, RH,
+    PoseThresholds, WalkingDetector, analyze_video, classify_frame,
+    is_crouch, is_hands_up, is_head_tilt, is_jump, is_leg_raise,
+    is_one_hand_raised, is_rotation, is_squat, is_t_pose,
+)
 
 SAMPLE_VIDEO = os.path.join("Dataset", "sample_dance.mp4")
 
@@ -44,3 +54,113 @@ def test_analyze_video_invalid_file():
     result = analyze_video("Dataset/non_existent.mp4")
     assert "error" in result
     assert isinstance(result["error"], str)
+
+
+def _random_keypoints(rng):
+    """Random (13, 2) keypoint array in normalized coordinates"""
+    return rng.random((len(JOINT_NAMES), 2)).astype(np.float32)
+
+
+def test_classify_frame_matches_predicates():
+    """Fused mask must agree with the standalone is_* predicates"""
+    rng = np.random.default_rng(42)
+    prev = None
+    for _ in range(200):
+        kp = _random_keypoints(rng)
+        mask = classify_frame(kp, prev)
+
+        expected = {
+            "hands_up": is_hands_up(kp),
+            "t_pose": is_t_pose(kp),
+            "squat": is_squat(kp),
+            "one_hand_raised": is_one_hand_raised(kp),
+            "jump": is_jump(kp, prev),
+            "rotation": is_rotation(kp, prev),
+            "leg_raise": is_leg_raise(kp),
+            "crouch": is_crouch(kp),
+            "head_tilt": is_head_tilt(kp),
+        }
+        for name, want in expected.items():
+            assert bool(mask[POSE_NAMES.index(name)]) == bool(want), name
+        prev = kp
+
+
+def test_classify_frame_standing_still():
+    """standing_still fires on tiny inter-frame movement only"""
+    still_i = POSE_NAMES.index("standing_still")
+    base = np.full((len(JOINT_NAMES), 2), 0.5, dtype=np.float32)
+
+    assert classify_frame(base + 1e-4, base)[still_i]
+    assert not classify_frame(base + 0.1, base)[still_i]
+    # No previous frame: never standing still
+    assert not classify_frame(base, None)[still_i]
+
+
+def _reference_walking(frames, buffer_size=30, x_thresh=0.02, min_alt_steps=3):
+    """Old deque-based WalkingDetector, kept as a behavioural reference"""
+    left_rel = deque(maxlen=buffer_size)
+    right_rel = deque(maxlen=buffer_size)
+    events = deque(maxlen=buffer_size)
+    out = []
+    for kp in frames:
+        left_rel.append(kp[LA, 0] - kp[LH, 0])
+        right_rel.append(kp[RA, 0] - kp[RH, 0])
+        if len(left_rel) < 2:
+            out.append(False)
+            continue
+        if abs(left_rel[-1] - left_rel[-2]) > x_thresh:
+            events.append('L')
+        if abs(right_rel[-1] - right_rel[-2]) > x_thresh:
+            events.append('R')
+        if len(events) < min_alt_steps:
+            out.append(False)
+            continue
+        last = list(events)[-min_alt_steps:]
+        out.append(all(last[i] != last[i + 1] for i in range(len(last) - 1)))
+    return out
+
+
+def test_walking_detector_matches_deque_reference():
+    """Bit-ring WalkingDetector must match the old deque semantics"""
+    rng = np.random.default_rng(7)
+    # Small random motion so step events trigger on some frames only
+    frames = [_random_keypoints(rng) * 0.1 for _ in range(300)]
+
+    detector = WalkingDetector()
+    got = [detector.update(kp) for kp in frames]
+
+    assert got == _reference_walking(frames)
+
+
+def test_pose_thresholds_slot_layout():
+    """as_array packs the documented kernel slots with derived values"""
+    thresholds = PoseThresholds.from_raw(
+        hands_thresh=0.1, t_height=0.2, t_outward=0.3,
+        knee_thresh=90, standing_thresh=0.13,
+        jump_thresh=0.4, rot_thresh=0.5,
+        hip_drop_thresh=0.6, leg_hip_thresh=0.7,
+        torso_thresh=0.8, tilt_thresh=0.9)
+    arr = thresholds.as_array()
+
+    assert arr.shape == (11,)
+    assert list(arr[:3]) == [0.1, 0.2, 0.3]
+    assert arr[3] == pytest.approx(math.cos(math.radians(90)))
+    assert arr[4] == pytest.approx(0.13 ** 2 / len(JOINT_NAMES))
+    assert list(arr[5:]) == [0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def test_cython_kernel_matches_python_kernel():
+    """Compiled predicate kernel must agree with the Python/Numba one"""
+    _predicates = pytest.importorskip("_predicates")
+    from analysis import _py_classify_kernel, pack_thresholds
+
+    rng = np.random.default_rng(3)
+    thr = pack_thresholds()
+    prev = _random_keypoints(rng)
+    for _ in range(100):
+        kp = _random_keypoints(rng)
+        for has_prev in (False, True):
+            got = _predicates.classify_kernel(kp, prev, has_prev, thr)
+            want = _py_classify_kernel(kp, prev, has_prev, thr)
+            assert np.array_equal(got, want)
+        prev = kp